@@ -1,8 +1,147 @@
 import fitz  # PyMuPDF library for PDF processing
-import json
+import os
 import csv
 import re
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from json_io import dumps_json
+
+# All patterns are compiled once at import instead of on every extract_* call
+_I = re.IGNORECASE
+_DI = re.DOTALL | re.IGNORECASE
+
+# Every "Artículo N." heading; sections are located through this index
+_ARTICLE_RE = re.compile(r"Artículo (\d+)\.", _I)
+
+# Academic year
+_CURSO_RE = re.compile(r"CURSO ACADÉMICO (20\d{2}-20\d{2})", _I)
+_YEAR_FULL_RE = re.compile(r"20\d{2}-20\d{2}")
+_YEAR_SHORT_RE = re.compile(r"20\d{2}-\d{2}")
+
+# Programs (Article 3) and the PDF "noise" removed from them
+_PROGRAMS_HEAD_RE = re.compile(r"Artículo 3\. Enseñanzas comprendidas\.", _I)
+_CAPITULO_II_RE = re.compile(r"CAPÍTULO II", _I)
+_PROGRAM_LINE_RE = re.compile(r"^[^\S\n]*(\S[^\n]{9,}\S)[^\S\n]*$", re.MULTILINE)
+_PROGRAMS_NOISE_RE = re.compile(r"(?:CSV :|FIRMANTE|DIRECCIÓN DE VALIDACIÓN).*")
+
+# Amounts
+_RENTA_FIJA_RE = re.compile(r"Cuantía fija ligada a la renta.*?:?\s*([\d\.,]+)\s*euros", _I)
+_RESIDENCIA_RE = re.compile(r"Cuantía fija ligada a la residencia.*?:?\s*([\d\.,]+)\s*euros", _I)
+_BASICA_RE = re.compile(r"Beca básica.*?:?\s*([\d\.,]+)\s*euros", _I)
+# Both wordings of the variable minimum are tried at every "cuantía variable" in one scan
+_VARIABLE_RE = re.compile(
+    r"cuantía variable"
+    r"(?=(?:.*?importe mínimo.*?([\d\.,]+)\s*euros)?)"
+    r"(?=(?:.*?mínimo será de\s*([\d\.,]+)\s*euros)?)",
+    _I,
+)
+_EXCELENCIA_CHAIN = (
+    re.compile(r"excelencia académica", _I),
+    re.compile(r":"),
+    re.compile(r"entre\s*([\d\.,]+)\s*y\s*([\d\.,]+)\s*euros", _I),
+)
+_EXCELENCIA_COMMON_RE = re.compile(r"(125|50)\s*euros")
+
+# Income thresholds (Article 19)
+_UMBRALES_START_RE = re.compile(r"Artículo 1?9\. Umbrales de renta", _I)
+_UMBRALES_END_RE = re.compile(r"Artículo 2?0\.")
+_UMBRAL_MARK_RE = re.compile(r"Umbral (\d)(:)?|Artículo 20", _I)
+_MEMBERS_RE = re.compile(r"Familias de ([a-z]+|\d+) miembros?:?\s*([\d\.,]+)\s*euros", _I)
+_TABLE_ROW_RE = re.compile(
+    r"^[^\S\n]*(?:"
+    r"(0*1?\d)[^\S\n]+([\d\.]+)[^\S\n]+([\d\.]+)(?:[^\S\n]+([\d\.]+))?"
+    r"|(0*1?\d)[^\S\n]*\n[^\S\n]*([\d\.]+)[^\S\n]*\n[^\S\n]*([\d\.]+)[^\S\n]*$(?:\n[^\S\n]*([\d\.]+)[^\S\n]*$)?"
+    r")",
+    re.MULTILINE,
+)
+
+# Wealth thresholds (Article 20)
+_PATRIMONIO_KEY_RE = re.compile(r"Umbrales indicativos de patrimonio familiar\.", _I)
+_PATRIMONIO_ALT_END_RE = re.compile(r"Artículo 21|CAPÍTULO", _I)
+_URBAN_RE = re.compile(r"fincas urbanas.*?superar.*?([\d\.,]+)\s*euros", _I)
+_RURAL_CONST_RE = re.compile(r"construcciones situadas en fincas rústicas.*?superar.*?([\d\.,]+)\s*euros", _I)
+_RURAL_LAND_RE = re.compile(r"fincas rústicas excluidos.*?superar.*?([\d\.,]+)\s*euros.*?miembro", _I)
+_CAPITAL_RE = re.compile(r"capital mobiliario.*?superar\s*([\d\.,]+)\s*euros", _I)
+
+# Academic requirements
+# Anchor chains: each piece is searched from where the previous one ended (see _find_chain)
+_CREDITS_CHAIN = (
+    re.compile(r"matriculados?", _I),
+    re.compile(r"de\s+(\d+)\s+créditos", _I),
+    re.compile(r"tiempo\s+completo", _I),
+)
+_PARTIAL_CHAIN = (
+    re.compile(r"matrícula parcial|matricularse de un mínimo de", _I),
+    re.compile(r"(\d+)\s+créditos", _I),
+)
+_ENTRY_CHAIN = (
+    re.compile(r"requerirá", _I),
+    re.compile(r"nota de\s+([\d,]+)\s+puntos", _I),
+    re.compile(r"acceso", _I),
+)
+_PASS_RATE_AREAS = tuple((re.compile(pattern, _I), area_name) for pattern, area_name in (
+    (r"Artes y Humanidades\s*[.\s]*\n?\s*(\d+)\s*%", "Artes y Humanidades"),
+    (r"Ciencias\s*[.\s]*\n?\s*(\d+)\s*%", "Ciencias"),
+    (r"Ciencias Sociales y Jurídicas\s*[.\s]*\n?\s*(\d+)\s*%", "Ciencias Sociales y Jurídicas"),
+    (r"Ciencias de la Salud\s*[.\s]*\n?\s*(\d+)\s*%", "Ciencias de la Salud"),
+    (r"Ingeniería o Arquitectura.*?\n?\s*(\d+)\s*%", "Ingeniería y Arquitectura"),
+))
+
+# Excellence brackets ("Between X and Y points")
+_EXCELLENCE_BRACKETS = tuple((re.compile(pattern, _I), grade_range) for pattern, grade_range in (
+    (r"(?:Entre\s+)?8,00\s+y\s+8,49\s+puntos\s*\n?\s*(\d+)\s*euros", "8.00-8.49"),
+    (r"(?:Entre\s+)?8,50\s+y\s+8,99\s+puntos\s*\n?\s*(\d+)\s*euros", "8.50-8.99"),
+    (r"(?:Entre\s+)?9,00\s+y\s+9,49\s+puntos\s*\n?\s*(\d+)\s*euros", "9.00-9.49"),
+    (r"9,50\s+puntos\s+o\s+más\s*\n?\s*(\d+)\s*euros", "9.50+"),
+))
+
+# Insular supplements (Article 12)
+_INSULAR_KEY_RE = re.compile(r"domicilio insular|Cuantías adicionales", _I)
+_INSULAR_BASIC_RE = re.compile(r"dispondrán de\s*([\d\.,]+)\s*euros", _DI)
+_INSULAR_REMOTE_RE = re.compile(r"(?:adicional será de|adicional de)\s*([\d\.,]+)\s*euros.*?(?:Lanzarote|Fuerteventura)", _DI)
+_INSULAR_REMOTE_ALT_RE = re.compile(r"([\d\.,]+)\s*euros.*?(?:Lanzarote|Fuerteventura)", _DI)
+_PENINSULA_RE = re.compile(r"serán\s*(?:de\s*)?([\d\.,]+)\s*euros\s*y\s*([\d\.,]+)\s*euros", _DI)
+_FP_CANARIAS_RE = re.compile(r"incrementarán en\s*([\d\.,]+)\s*euros", _DI)
+
+# Income deductions
+_DEDUCTIONS_RE = re.compile(r"deducciones siguientes:", _I)
+_CAPITULO_RE = re.compile(r"CAPÍTULO", _I)
+_DED_FAM_GRAL_RE = re.compile(r"(\d[\d\.,]*)\s*euros.*?familias numerosas de categoría general", _DI)
+_DED_FAM_ESP_RE = re.compile(r"categoría general y\s*([\d\.,]+)\s*euros", _DI)
+_DED_FAM_ESP_ALT_RE = re.compile(r"([\d\.,]+)\s*euros.*?familias numerosas de categoría especial", _DI)
+_DED_DISC_33_RE = re.compile(r"c\)\s*([\d\.,]+)\s*euros.*?discapacidad.*?treinta y tres", _DI)
+_DED_DISC_65_RE = re.compile(r"treinta y tres por\s*ciento\s*y\s*([\d\.,]+)\s*euros", _DI)
+_DED_DISC_UNI_RE = re.compile(r"dicho solicitante\s*será\s*de\s*([\d\.,]+)\s*euros", _DI)
+_DED_HERMANO_RE = re.compile(r"d\)\s*([\d\.,]+)\s*euros.*?hermano.*?resida fuera", _DI)
+_DED_HUERFANO_RE = re.compile(r"e\)\s*(?:El\s*)?(\d+)\s*(?:%|por\s*ciento)", _DI)
+_DED_MONO_RE = re.compile(r"f\)\s*([\d\.,]+)\s*euros.*?monoparental", _DI)
+
+# Disability provisions (Article 13)
+_DISABILITY_KEY_RE = re.compile(r"discapacidad|Becas especiales", _I)
+_DISC_REDUCE_RE = re.compile(r"65 por\s*ciento.*?reducir.*?carga lectiva", _I)
+_DISC_REDUCE_ALT_RE = re.compile(r"discapacidad.*?65.*?reducir", _I)
+_DISC_INCR_25_RE = re.compile(r"incremento.*?(\d+) por\s*ciento.*?discapacidad.*?25.*?65", _I)
+_DISC_INCR_25_ALT_RE = re.compile(r"(\d+) por\s*ciento.*?discapacidad igual o superior al 25", _I)
+_DISC_INCR_50_RE = re.compile(r"incrementarán en un (\d+) por\s*ciento", _I)
+
+# Application deadlines
+_DEADLINES_RE = re.compile(r"Plazo de presentación de solicitudes\.", _I)
+_DEADLINES_END_RE = re.compile(r"Artículo|CAPÍTULO", _I)
+_DEADLINES_ALT_RE = re.compile(r"plazos? para presentar la solicitud.*?(?=\. \d)", _DI)
+_DATE_RE = re.compile(r"(\d{1,2} de \w+ de \d{4})")
+# One call per student type; \A[\s\S]*? makes the first wording win anywhere in the text
+# before the reversed "date ... estudiantes" wording is tried
+_UNI_RE = re.compile(
+    r"\A(?:[\s\S]*?estudiantes universitarios.*?(?:hasta el|día)\s*(\d{1,2} de \w+ de \d{4})"
+    r"|[\s\S]*?(\d{1,2} de \w+ de \d{4}).*?estudiantes universitarios)",
+    _I,
+)
+_NON_UNI_RE = re.compile(
+    r"\A(?:[\s\S]*?estudiantes no universitarios.*?(?:hasta el|día)\s*(\d{1,2} de \w+ de \d{4})"
+    r"|[\s\S]*?(\d{1,2} de \w+ de \d{4}).*?estudiantes no universitarios)",
+    _I,
+)
+
 
 class SistemaExtraccionBecas:
     """
@@ -19,21 +158,67 @@ class SistemaExtraccionBecas:
         """Cleans up the text by removing extra spaces and messy line breaks."""
         if not text:
             return ""
-        return re.sub(r'\s+', ' ', text).strip()
+        # str.split() collapses the same Unicode whitespace as \s+ and drops the ends
+        return " ".join(text.split())
+
+    def _build_article_index(self, text):
+        """Maps each article number to the offsets of its "Artículo N." headings (one pass over the text)."""
+        articulos = {}
+        for m in _ARTICLE_RE.finditer(text):
+            articulos.setdefault(m.group(1), []).append(m.start())
+        return articulos
+
+    def _find_article(self, text, numeros, desde=0, patron=_ARTICLE_RE):
+        """First match of `patron` at an "Artículo N." heading (N in `numeros`, or any N if None) at or after `desde`."""
+        # The index is built once per document and reused by every extract_* method
+        if getattr(self, "_article_spans", (None,))[0] is not text:
+            self._article_spans = (text, self._build_article_index(text))
+        articulos = self._article_spans[1]
+        if numeros is None:
+            numeros = articulos
+        for pos in sorted(p for n in numeros for p in articulos.get(n, ()) if p >= desde):
+            match = patron.match(text, pos)
+            if match:
+                return match
+        return None
+
+    @staticmethod
+    def _find(pat, text, default="No detectado", group=1):
+        """Returns `group` of the first match of `pat` in `text`, or `default`."""
+        m = pat.search(text)
+        return m.group(group) if m else default
+
+    @staticmethod
+    def _find_chain(text, patrones):
+        """Matches `patrones` in order, each one searched from where the previous match ended.
+
+        Same result as a single DOTALL "A.*?B.*?C" search when the pieces cannot overlap
+        themselves, but linear: no lazy gap is re-expanded from every candidate start.
+        Returns the list of matches, or None if a piece is missing.
+        """
+        matches = []
+        pos = 0
+        for patron in patrones:
+            m = patron.search(text, pos)
+            if not m:
+                return None
+            matches.append(m)
+            pos = m.end()
+        return matches
 
     def extract_academic_year(self, text, filename):
         """Identifies the academic year (e.g., 2023-2024) from the text or filename."""
         # First, we look for the pattern in the document's header
-        match = re.search(r"CURSO ACADÉMICO (20\d{2}-20\d{2})", text, re.IGNORECASE)
+        match = _CURSO_RE.search(text)
         if match:
             return match.group(1)
         
         # If not found there, we try to guess it from the filename itself
-        match = re.search(r"20\d{2}-20\d{2}", filename)
+        match = _YEAR_FULL_RE.search(filename)
         if match:
             return match.group(0)
         
-        match = re.search(r"20\d{2}-\d{2}", filename)
+        match = _YEAR_SHORT_RE.search(filename)
         if match:
             parts = match.group(0).split('-')
             return f"20{parts[0][2:]}-20{parts[1]}"
@@ -44,22 +229,20 @@ class SistemaExtraccionBecas:
         """Extracts the educational programs covered by the grant (Found in Article 3)."""
         programs = []
         # We look specifically between "Article 3" and the start of "Chapter II"
-        pattern = r"Artículo 3\. Enseñanzas comprendidas\.(.*?)CAPÍTULO II"
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+        start = self._find_article(text, ("3",), patron=_PROGRAMS_HEAD_RE)
+        end = _CAPITULO_II_RE.search(text, start.end()) if start else None
         
-        if match:
-            content = match.group(1)
+        if end:
+            content = text[start.end():end.start()]
             # We remove common PDF "noise" like digital signatures or validation codes
-            content = re.sub(r"CSV :.*", "", content)
-            content = re.sub(r"FIRMANTE.*", "", content)
-            content = re.sub(r"DIRECCIÓN DE VALIDACIÓN.*", "", content)
+            # (one pass: each line is cut at its first marker, as the three separate subs did)
+            content = _PROGRAMS_NOISE_RE.sub("", content)
             
-            # We split by line to find individual items in the list
-            lines = content.split('\n')
-            for line in lines:
-                line = line.strip()
-                # Skip lines that are too short or just numbers (like page numbers)
-                if len(line) > 10 and not line.isdigit() and "Página" not in line: 
+            # Each item is a line; the regex only yields stripped lines longer than 10 characters
+            for m in _PROGRAM_LINE_RE.finditer(content):
+                line = m.group(1)
+                # Skip lines that are just numbers (like page numbers)
+                if not line.isdigit() and "Página" not in line:
                     programs.append(line)
         
         # Merge everything into a clean string
@@ -72,35 +255,41 @@ class SistemaExtraccionBecas:
         amounts = {}
         
         # 1. Fixed amount tied to income
-        renta_match = re.search(r"Cuantía fija ligada a la renta.*?:?\s*([\d\.,]+)\s*euros", text, re.IGNORECASE)
-        amounts["cuantia_renta_fija"] = renta_match.group(1) if renta_match else "No detectado"
+        amounts["cuantia_renta_fija"] = self._find(_RENTA_FIJA_RE, text)
         
         # 2. Fixed amount for residency (living away from home)
-        residencia_match = re.search(r"Cuantía fija ligada a la residencia.*?:?\s*([\d\.,]+)\s*euros", text, re.IGNORECASE)
-        amounts["cuantia_residencia"] = residencia_match.group(1) if residencia_match else "No detectado"
+        amounts["cuantia_residencia"] = self._find(_RESIDENCIA_RE, text)
         
         # 3. Basic scholarship
-        basica_match = re.search(r"Beca básica.*?:?\s*([\d\.,]+)\s*euros", text, re.IGNORECASE)
-        amounts["beca_basica"] = basica_match.group(1) if basica_match else "No detectado"
+        amounts["beca_basica"] = self._find(_BASICA_RE, text)
         
         # 4. Variable amount (minimum)
-        variable_match = re.search(r"cuantía variable.*?importe mínimo.*?([\d\.,]+)\s*euros", text, re.IGNORECASE)
-        if not variable_match:
-             variable_match = re.search(r"cuantía variable.*?mínimo será de\s*([\d\.,]+)\s*euros", text, re.IGNORECASE)
-
-        amounts["cuantia_variable_minima"] = variable_match.group(1) if variable_match else "60,00" # Defaults to 60€
+        # ("importe mínimo" anywhere wins over the first "mínimo será de")
+        variable_min = variable_alt = None
+        for variable_match in _VARIABLE_RE.finditer(text):
+            if variable_match.group(1):
+                variable_min = variable_match.group(1)
+                break
+            if variable_alt is None:
+                variable_alt = variable_match.group(2)
+
+        amounts["cuantia_variable_minima"] = variable_min or variable_alt or "60,00" # Defaults to 60€
         
         # 5. Excellence bonuses (Academic performance)
-        excelencia_match = re.search(r"excelencia académica.*?:.*?entre\s*([\d\.,]+)\s*y\s*([\d\.,]+)\s*euros", text, re.IGNORECASE | re.DOTALL)
-        if excelencia_match:
-            amounts["excelencia_min"] = excelencia_match.group(1)
-            amounts["excelencia_max"] = excelencia_match.group(2)
+        excelencia_chain = self._find_chain(text, _EXCELENCIA_CHAIN)
+        if excelencia_chain:
+            amounts["excelencia_min"] = excelencia_chain[-1].group(1)
+            amounts["excelencia_max"] = excelencia_chain[-1].group(2)
         else:
              # If the range isn't explicitly stated, we search for common values like 50€ and 125€
-             min_match = re.search(r"50\s*euros", text)
-             max_match = re.search(r"125\s*euros", text)
-             amounts["excelencia_min"] = "50" if min_match else "No detectado"
-             amounts["excelencia_max"] = "125" if max_match else "No detectado"
+             # (a single scan that stops as soon as both values have been seen)
+             found = set()
+             for m in _EXCELENCIA_COMMON_RE.finditer(text):
+                 found.add(m.group(1))
+                 if len(found) == 2:
+                     break
+             amounts["excelencia_min"] = "50" if "50" in found else "No detectado"
+             amounts["excelencia_max"] = "125" if "125" in found else "No detectado"
 
         return amounts
 
@@ -109,29 +298,32 @@ class SistemaExtraccionBecas:
         thresholds = {}
         
         # Look for Article 19 section
-        start_pattern = r"Artículo 1?9\. Umbrales de renta.*?"
-        match = re.search(start_pattern, text, re.IGNORECASE)
+        match = self._find_article(text, ("19", "9"), patron=_UMBRALES_START_RE)
         
         if not match:
             return "No detectado"
             
         start_pos = match.end()
         # Find where it ends (usually at Article 20)
-        end_match = re.search(r"Artículo 2?0\.", text[start_pos:])
-        end_pos = start_pos + end_match.start() if end_match else min(start_pos + 5000, len(text))
+        end_match = self._find_article(text, ("20", "0"), start_pos, _UMBRALES_END_RE)
+        end_pos = end_match.start() if end_match else min(start_pos + 5000, len(text))
         
         content = text[start_pos:end_pos]
         
         # Strategy A: List format (e.g., Threshold 1: ...)
+        # One pass collects every "Umbral N" / "Artículo 20" marker; the "Umbral N:" section
+        # runs from its first header to the next "Umbral N+1" or "Artículo 20"
+        marcas = [(m.start(), m.end(), m.group(1), m.group(2)) for m in _UMBRAL_MARK_RE.finditer(content)]
         list_found = False
         for i in range(1, 4):
             umbral_key = f"Umbral {i}"
-            section_match = re.search(rf"{umbral_key}:(.*?)(?:Umbral {i+1}|Artículo 20|$)", content, re.DOTALL | re.IGNORECASE)
-            if section_match:
-                section_text = section_match.group(1)
+            inicio = next((k for k, marca in enumerate(marcas) if marca[2] == str(i) and marca[3]), None)
+            if inicio is not None:
+                fin = next((marca[0] for marca in marcas[inicio + 1:] if marca[2] in (str(i + 1), None)), len(content))
+                section_text = content[marcas[inicio][1]:fin]
                 t_vals = {}
                 # Extract members and their respective limits
-                members_matches = re.finditer(r"Familias de ([a-z]+|\d+) miembros?:?\s*([\d\.,]+)\s*euros", section_text, re.IGNORECASE)
+                members_matches = _MEMBERS_RE.finditer(section_text)
                 for m in members_matches:
                     t_vals[m.group(1)] = m.group(2)
                 if t_vals:
@@ -141,44 +333,16 @@ class SistemaExtraccionBecas:
         # Strategy B: Table format (harder to parse if lines get shifted)
         if not list_found:
             table_data = []
-            lines = content.split('\n')
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                # Check for "Row" format: Number (members) followed by 3 monetary amounts
-                table_match = re.match(r"^(\d+)\s+([\d\.]+)\s+([\d\.]+)(?:\s+([\d\.]+))?", line)
-                if table_match and int(table_match.group(1)) < 20: 
-                     table_data.append({
-                        "miembros": table_match.group(1),
-                        "umbral_1": table_match.group(2),
-                        "umbral_2": table_match.group(3),
-                        "umbral_3": table_match.group(4) if table_match.group(4) else "N/A"
-                    })
-                     i += 1
-                     continue
-
-                # Sometimes tables are split line-by-line in the PDF
-                if re.match(r"^\d+$", line) and int(line) < 20:
-                    members = line
-                    vals = []
-                    lookahead = 1
-                    while looks_like_amount(lines, i + lookahead):
-                         vals.append(lines[i + lookahead].strip())
-                         lookahead += 1
-                         if len(vals) >= 3: break
-                    
-                    if len(vals) >= 2: 
-                        table_data.append({
-                            "miembros": members,
-                            "umbral_1": vals[0],
-                            "umbral_2": vals[1],
-                            "umbral_3": vals[2] if len(vals) > 2 else "N/A"
-                        })
-                        i += lookahead
-                        continue
-                
-                i += 1
+            # Each match is either a whole row on one line ("members amount amount [amount]")
+            # or a row the PDF split into one value per line; members must be below 20
+            for m in _TABLE_ROW_RE.finditer(content):
+                members, umbral_1, umbral_2, umbral_3 = m.group(1, 2, 3, 4) if m.group(1) else m.group(5, 6, 7, 8)
+                table_data.append({
+                    "miembros": members,
+                    "umbral_1": umbral_1,
+                    "umbral_2": umbral_2,
+                    "umbral_3": umbral_3 if umbral_3 else "N/A"
+                })
 
             if table_data:
                 thresholds["tabla"] = table_data
@@ -190,32 +354,40 @@ class SistemaExtraccionBecas:
         result = {}
 
         # Scan for Article 20 section
-        match = re.search(r"Artículo 20\..*?Umbrales indicativos de patrimonio familiar\.(.*?)Artículo 21\.", text, re.DOTALL | re.IGNORECASE)
-        if not match:
-            match = re.search(r"umbrales indicativos de patrimonio familiar\.(.*?)(?:Artículo 21|CAPÍTULO)", text, re.DOTALL | re.IGNORECASE)
+        content = None
+        start = self._find_article(text, ("20",))
+        key = _PATRIMONIO_KEY_RE.search(text, start.end()) if start else None
+        end = self._find_article(text, ("21",), key.end()) if key else None
+        if end:
+            content = self.clean_text(text[key.end():end.start()])
+        else:
+            # Fallback: from the first keyword to "Artículo 21" or the next chapter
+            key = _PATRIMONIO_KEY_RE.search(text)
+            end = _PATRIMONIO_ALT_END_RE.search(text, key.end()) if key else None
+            if end:
+                content = self.clean_text(text[key.end():end.start()])
 
-        if match:
-            content = self.clean_text(match.group(1))
+        if content is not None:
 
             # Urban properties limit
-            urban = re.search(r"fincas urbanas.*?superar.*?([\d\.,]+)\s*euros", content, re.IGNORECASE)
+            urban = self._find(_URBAN_RE, content, None)
             if urban:
-                result["fincas_urbanas_limite"] = urban.group(1)
+                result["fincas_urbanas_limite"] = urban
 
             # Rural constructions limit
-            rural_const = re.search(r"construcciones situadas en fincas rústicas.*?superar.*?([\d\.,]+)\s*euros", content, re.IGNORECASE)
+            rural_const = self._find(_RURAL_CONST_RE, content, None)
             if rural_const:
-                result["construcciones_rusticas_limite"] = rural_const.group(1)
+                result["construcciones_rusticas_limite"] = rural_const
 
             # Rural land limit (per family member)
-            rural_land = re.search(r"fincas rústicas excluidos.*?superar.*?([\d\.,]+)\s*euros.*?miembro", content, re.IGNORECASE)
+            rural_land = self._find(_RURAL_LAND_RE, content, None)
             if rural_land:
-                result["fincas_rusticas_limite_por_miembro"] = rural_land.group(1)
+                result["fincas_rusticas_limite_por_miembro"] = rural_land
 
             # Financial capital limit (savings, etc.)
-            capital = re.search(r"capital mobiliario.*?superar\s*([\d\.,]+)\s*euros", content, re.IGNORECASE)
+            capital = self._find(_CAPITAL_RE, content, None)
             if capital:
-                result["capital_mobiliario_limite"] = capital.group(1)
+                result["capital_mobiliario_limite"] = capital
 
         return result if result else "No detectado"
 
@@ -224,31 +396,24 @@ class SistemaExtraccionBecas:
         result = {}
 
         # Minimum credits for full-time students
-        credits_match = re.search(r"matriculados?.*?de\s+(\d+)\s+créditos.*?tiempo\s+completo", text, re.IGNORECASE | re.DOTALL)
-        if credits_match:
-            result["creditos_tiempo_completo"] = int(credits_match.group(1))
+        credits_chain = self._find_chain(text, _CREDITS_CHAIN)
+        if credits_chain:
+            result["creditos_tiempo_completo"] = int(credits_chain[1].group(1))
 
         # Minimum credits for partial enrollment
-        partial_match = re.search(r"(?:matrícula parcial|matricularse de un mínimo de)\s*.*?(\d+)\s+créditos", text, re.IGNORECASE | re.DOTALL)
-        if partial_match:
-            result["creditos_matricula_parcial"] = int(partial_match.group(1))
+        partial_chain = self._find_chain(text, _PARTIAL_CHAIN)
+        if partial_chain:
+            result["creditos_matricula_parcial"] = int(partial_chain[1].group(1))
 
         # Entry grade for new university students
-        entry_match = re.search(r"requerirá.*?nota de\s+([\d,]+)\s+puntos.*?acceso", text, re.IGNORECASE | re.DOTALL)
-        if entry_match:
-            result["nota_acceso_universidad"] = entry_match.group(1)
+        entry_chain = self._find_chain(text, _ENTRY_CHAIN)
+        if entry_chain:
+            result["nota_acceso_universidad"] = entry_chain[1].group(1)
 
         # Extraction of the percentage of credits that must be passed depending on the degree
         pass_rates = {}
-        areas = [
-            (r"Artes y Humanidades\s*[.\s]*\n?\s*(\d+)\s*%", "Artes y Humanidades"),
-            (r"Ciencias\s*[.\s]*\n?\s*(\d+)\s*%", "Ciencias"),
-            (r"Ciencias Sociales y Jurídicas\s*[.\s]*\n?\s*(\d+)\s*%", "Ciencias Sociales y Jurídicas"),
-            (r"Ciencias de la Salud\s*[.\s]*\n?\s*(\d+)\s*%", "Ciencias de la Salud"),
-            (r"Ingeniería o Arquitectura.*?\n?\s*(\d+)\s*%", "Ingeniería y Arquitectura"),
-        ]
-        for pattern, area_name in areas:
-            m = re.search(pattern, text, re.IGNORECASE)
+        for area_re, area_name in _PASS_RATE_AREAS:
+            m = area_re.search(text)
             if m:
                 pass_rates[area_name] = f"{m.group(1)}%"
 
@@ -262,15 +427,8 @@ class SistemaExtraccionBecas:
         brackets = []
 
         # We look for "Between X and Y points" patterns
-        bracket_patterns = [
-            (r"(?:Entre\s+)?8,00\s+y\s+8,49\s+puntos\s*\n?\s*(\d+)\s*euros", "8.00-8.49"),
-            (r"(?:Entre\s+)?8,50\s+y\s+8,99\s+puntos\s*\n?\s*(\d+)\s*euros", "8.50-8.99"),
-            (r"(?:Entre\s+)?9,00\s+y\s+9,49\s+puntos\s*\n?\s*(\d+)\s*euros", "9.00-9.49"),
-            (r"9,50\s+puntos\s+o\s+más\s*\n?\s*(\d+)\s*euros", "9.50+"),
-        ]
-
-        for pattern, grade_range in bracket_patterns:
-            m = re.search(pattern, text, re.IGNORECASE)
+        for bracket_re, grade_range in _EXCELLENCE_BRACKETS:
+            m = bracket_re.search(text)
             if m:
                 brackets.append({
                     "nota_media": grade_range,
@@ -283,35 +441,34 @@ class SistemaExtraccionBecas:
         """Extracts extra aid for students from islands, Ceuta, or Melilla."""
         result = {}
 
-        match = re.search(r"Artículo 12\..*?(?:domicilio insular|Cuantías adicionales)(.*?)Artículo 13\.", text, re.DOTALL | re.IGNORECASE)
-        if not match:
+        start = self._find_article(text, ("12",))
+        key = _INSULAR_KEY_RE.search(text, start.end()) if start else None
+        end = self._find_article(text, ("13",), key.end()) if key else None
+        if not end:
             return "No detectado"
 
-        content = match.group(1)
-        flags = re.IGNORECASE | re.DOTALL
+        content = text[key.end():end.start()]
 
         # Basic island supplement
-        basic = re.search(r"dispondrán de\s*([\d\.,]+)\s*euros", content, flags)
+        basic = self._find(_INSULAR_BASIC_RE, content, None)
         if basic:
-            result["suplemento_insular_basico"] = basic.group(1)
+            result["suplemento_insular_basico"] = basic
 
         # Supplement for remote islands (like Lanzarote or Fuerteventura)
-        remote = re.search(r"(?:adicional será de|adicional de)\s*([\d\.,]+)\s*euros.*?(?:Lanzarote|Fuerteventura)", content, flags)
-        if not remote:
-            remote = re.search(r"([\d\.,]+)\s*euros.*?(?:Lanzarote|Fuerteventura)", content, flags)
+        remote = self._find(_INSULAR_REMOTE_RE, content, None) or self._find(_INSULAR_REMOTE_ALT_RE, content, None)
         if remote:
-            result["suplemento_islas_remotas"] = remote.group(1)
+            result["suplemento_islas_remotas"] = remote
 
         # Inter-island travel to the Mainland
-        peninsula_amounts = re.findall(r"serán\s*(?:de\s*)?([\d\.,]+)\s*euros\s*y\s*([\d\.,]+)\s*euros", content, flags)
+        peninsula_amounts = _PENINSULA_RE.findall(content)
         if peninsula_amounts:
             result["suplemento_interinsular_peninsula"] = peninsula_amounts[0][0]
             result["suplemento_interinsular_peninsula_remotas"] = peninsula_amounts[0][1]
 
         # Extra for Canary Islands vocational training
-        fp_extra = re.search(r"incrementarán en\s*([\d\.,]+)\s*euros", content, flags)
+        fp_extra = self._find(_FP_CANARIAS_RE, content, None)
         if fp_extra:
-            result["suplemento_fp_canarias"] = fp_extra.group(1)
+            result["suplemento_fp_canarias"] = fp_extra
 
         return result if result else "No detectado"
 
@@ -320,52 +477,54 @@ class SistemaExtraccionBecas:
         result = {}
 
         # Isolate the deductions section
-        ded_match = re.search(r"deducciones siguientes:(.*?)(?:Artículo \d+\.|CAPÍTULO)", text, re.DOTALL | re.IGNORECASE)
-        ded_text = ded_match.group(1) if ded_match else text
-
-        flags = re.IGNORECASE | re.DOTALL
+        # (it runs up to the next article heading, taken from the shared index, or chapter)
+        ded_text = text
+        ded_match = _DEDUCTIONS_RE.search(text)
+        if ded_match:
+            ends = [m.start() for m in (self._find_article(text, None, ded_match.end()),
+                                        _CAPITULO_RE.search(text, ded_match.end())) if m]
+            if ends:
+                ded_text = text[ded_match.end():min(ends)]
 
         # General large family
-        familia_gral = re.search(r"(\d[\d\.,]*)\s*euros.*?familias numerosas de categoría general", ded_text, flags)
+        familia_gral = self._find(_DED_FAM_GRAL_RE, ded_text, None)
         if familia_gral:
-            result["deduccion_familia_numerosa_general"] = familia_gral.group(1)
+            result["deduccion_familia_numerosa_general"] = familia_gral
 
         # Special large family
-        familia_esp = re.search(r"categoría general y\s*([\d\.,]+)\s*euros", ded_text, flags)
-        if not familia_esp:
-            familia_esp = re.search(r"([\d\.,]+)\s*euros.*?familias numerosas de categoría especial", ded_text, flags)
+        familia_esp = self._find(_DED_FAM_ESP_RE, ded_text, None) or self._find(_DED_FAM_ESP_ALT_RE, ded_text, None)
         if familia_esp:
-            result["deduccion_familia_numerosa_especial"] = familia_esp.group(1)
+            result["deduccion_familia_numerosa_especial"] = familia_esp
 
         # Disability 33%-65%
-        disc_33 = re.search(r"c\)\s*([\d\.,]+)\s*euros.*?discapacidad.*?treinta y tres", ded_text, flags)
+        disc_33 = self._find(_DED_DISC_33_RE, ded_text, None)
         if disc_33:
-            result["deduccion_discapacidad_33"] = disc_33.group(1)
+            result["deduccion_discapacidad_33"] = disc_33
 
         # Disability 65%+
-        disc_65 = re.search(r"treinta y tres por\s*ciento\s*y\s*([\d\.,]+)\s*euros", ded_text, flags)
+        disc_65 = self._find(_DED_DISC_65_RE, ded_text, None)
         if disc_65:
-            result["deduccion_discapacidad_65"] = disc_65.group(1)
+            result["deduccion_discapacidad_65"] = disc_65
 
         # University applicant with 65%+ disability
-        disc_uni = re.search(r"dicho solicitante\s*será\s*de\s*([\d\.,]+)\s*euros", ded_text, flags)
+        disc_uni = self._find(_DED_DISC_UNI_RE, ded_text, None)
         if disc_uni:
-            result["deduccion_discapacidad_65_universitario"] = disc_uni.group(1)
+            result["deduccion_discapacidad_65_universitario"] = disc_uni
 
         # Sibling studying away from home
-        hermano_fuera = re.search(r"d\)\s*([\d\.,]+)\s*euros.*?hermano.*?resida fuera", ded_text, flags)
+        hermano_fuera = self._find(_DED_HERMANO_RE, ded_text, None)
         if hermano_fuera:
-            result["deduccion_hermano_universitario_fuera"] = hermano_fuera.group(1)
+            result["deduccion_hermano_universitario_fuera"] = hermano_fuera
 
         # Orphans (usually a percentage deduction)
-        huerfano = re.search(r"e\)\s*(?:El\s*)?(\d+)\s*(?:%|por\s*ciento)", ded_text, flags)
+        huerfano = self._find(_DED_HUERFANO_RE, ded_text, None)
         if huerfano:
-            result["deduccion_huerfano_porcentaje"] = f"{huerfano.group(1)}%"
+            result["deduccion_huerfano_porcentaje"] = f"{huerfano}%"
 
         # Single-parent families
-        mono = re.search(r"f\)\s*([\d\.,]+)\s*euros.*?monoparental", ded_text, flags)
+        mono = self._find(_DED_MONO_RE, ded_text, None)
         if mono:
-            result["deduccion_familia_monoparental"] = mono.group(1)
+            result["deduccion_familia_monoparental"] = mono
 
         return result if result else "No detectado"
 
@@ -373,27 +532,26 @@ class SistemaExtraccionBecas:
         """Extracts support measures for students with disabilities."""
         result = {}
 
-        match = re.search(r"Artículo 13\..*?(?:discapacidad|Becas especiales)(.*?)Artículo 14\.", text, re.DOTALL | re.IGNORECASE)
-        if not match:
+        start = self._find_article(text, ("13",))
+        key = _DISABILITY_KEY_RE.search(text, start.end()) if start else None
+        end = self._find_article(text, ("14",), key.end()) if key else None
+        if not end:
             return "No detectado"
 
-        content = self.clean_text(match.group(1))
+        content = self.clean_text(text[key.end():end.start()])
 
         # Permission to reduce credit load
-        if re.search(r"65 por\s*ciento.*?reducir.*?carga lectiva", content, re.IGNORECASE) or \
-           re.search(r"discapacidad.*?65.*?reducir", content, re.IGNORECASE):
+        if _DISC_REDUCE_RE.search(content) or _DISC_REDUCE_ALT_RE.search(content):
             result["reduccion_carga_lectiva"] = "Discapacidad >= 65%"
 
         # Fixed percentage increments
-        incr_25 = re.search(r"incremento.*?(\d+) por\s*ciento.*?discapacidad.*?25.*?65", content, re.IGNORECASE)
-        if not incr_25:
-            incr_25 = re.search(r"(\d+) por\s*ciento.*?discapacidad igual o superior al 25", content, re.IGNORECASE)
+        incr_25 = self._find(_DISC_INCR_25_RE, content, None) or self._find(_DISC_INCR_25_ALT_RE, content, None)
         if incr_25:
-            result["incremento_discapacidad_25_65"] = f"{incr_25.group(1)}%"
+            result["incremento_discapacidad_25_65"] = f"{incr_25}%"
 
-        incr_50 = re.search(r"incrementarán en un (\d+) por\s*ciento", content, re.IGNORECASE)
+        incr_50 = self._find(_DISC_INCR_50_RE, content, None)
         if incr_50:
-            result["incremento_matricula_completa_discapacidad"] = f"{incr_50.group(1)}%"
+            result["incremento_matricula_completa_discapacidad"] = f"{incr_50}%"
 
         return result if result else "No detectado"
 
@@ -402,28 +560,27 @@ class SistemaExtraccionBecas:
         deadlines = {}
         
         # Look for the "Term" or "Deadline" section
-        match = re.search(r"(?:Artículo \d+\.\s*)?(?:Lugar y )?Plazo de presentación de solicitudes\.(.*?)(?:Artículo|CAPÍTULO)", text, re.DOTALL | re.IGNORECASE)
+        # (from its first heading up to the next article or chapter)
+        match = _DEADLINES_RE.search(text)
+        end = _DEADLINES_END_RE.search(text, match.end()) if match else None
         
-        content = match.group(1) if match else ""
+        content = text[match.end():end.start()] if end else ""
         if not content:
-             match = re.search(r"plazos? para presentar la solicitud.*?(?=\. \d)", text, re.DOTALL | re.IGNORECASE)
+             match = _DEADLINES_ALT_RE.search(text)
              if match: content = match.group(0)
 
         if content:
             content_clean = self.clean_text(content)
             # Use regex to find dates format: "DD de month de YYYY"
-            dates = re.findall(r"(\d{1,2} de \w+ de \d{4})", content_clean)
+            dates = _DATE_RE.findall(content_clean)
             deadlines["fechas_encontradas"] = dates
             
             # Specific deadlines for university vs non-university students
-            uni_match = re.search(r"estudiantes universitarios.*?(?:hasta el|día)\s*(\d{1,2} de \w+ de \d{4})", content_clean, re.IGNORECASE)
-            if not uni_match: uni_match = re.search(r"(\d{1,2} de \w+ de \d{4}).*?estudiantes universitarios", content_clean, re.IGNORECASE)
-
-            non_uni_match = re.search(r"estudiantes no universitarios.*?(?:hasta el|día)\s*(\d{1,2} de \w+ de \d{4})", content_clean, re.IGNORECASE)
-            if not non_uni_match: non_uni_match = re.search(r"(\d{1,2} de \w+ de \d{4}).*?estudiantes no universitarios", content_clean, re.IGNORECASE)
+            uni_match = _UNI_RE.match(content_clean)
+            non_uni_match = _NON_UNI_RE.match(content_clean)
 
-            if uni_match: deadlines["universitarios"] = uni_match.group(1)
-            if non_uni_match: deadlines["no_universitarios"] = non_uni_match.group(1)
+            if uni_match: deadlines["universitarios"] = uni_match.group(1) or uni_match.group(2)
+            if non_uni_match: deadlines["no_universitarios"] = non_uni_match.group(1) or non_uni_match.group(2)
                 
             deadlines["texto_extracto"] = content_clean[:200]
         else:
@@ -431,6 +588,52 @@ class SistemaExtraccionBecas:
             
         return deadlines
 
+    def procesar_pdf(self, ruta_pdf):
+        """Extracts all the data from a single PDF (runs in a worker process)."""
+        print(f"Processing: {ruta_pdf.name}...")
+        try:
+            # We open the PDF and extract all text from all pages; the with-block closes it on every path
+            with fitz.open(ruta_pdf, filetype="pdf") as doc:
+                # Plain "text" mode with the default text flags and no reading-order sort
+                # (the BOE layout is single column)
+                paginas = []
+                plazo_abierto = False
+                for pagina in doc:
+                    pagina_texto = pagina.get_text("text", flags=fitz.TEXTFLAGS_TEXT, sort=False)
+                    paginas.append(pagina_texto)
+                    # The application deadlines article is the last section we parse: once its
+                    # closing heading has been read, the remaining pages are not needed
+                    inicio = 0
+                    if not plazo_abierto:
+                        plazo = _DEADLINES_RE.search(pagina_texto)
+                        if not plazo:
+                            continue
+                        plazo_abierto, inicio = True, plazo.end()
+                    if _DEADLINES_END_RE.search(pagina_texto, inicio):
+                        break
+                texto_completo = "".join(paginas)
+            
+            # We build a large dictionary with all the extracted info
+            info = {
+                "fichero": ruta_pdf.name,
+                "curso_academico": self.extract_academic_year(texto_completo, ruta_pdf.name),
+                "programas_educativos": self.extract_programs(texto_completo),
+                **self.extract_amounts(texto_completo),
+                "excelencia_tramos": self.extract_excellence_brackets(texto_completo),
+                "umbrales_renta": self.extract_thresholds(texto_completo),
+                "umbrales_patrimonio": self.extract_patrimonio_thresholds(texto_completo),
+                "requisitos_academicos": self.extract_academic_requirements(texto_completo),
+                "suplementos_insulares": self.extract_insular_supplements(texto_completo),
+                "deducciones_renta": self.extract_income_deductions(texto_completo),
+                "discapacidad": self.extract_disability_provisions(texto_completo),
+                "plazos_solicitud": self.extract_deadlines(texto_completo)
+            }
+            
+            return info
+        except Exception as e:
+            print(f"Error reading {ruta_pdf.name}: {e}")
+            return None
+
     def ejecutar(self):
         """Main execution loop: finds PDFs, extracts data, and saves it."""
         if not self.ruta_data.exists():
@@ -440,75 +643,47 @@ class SistemaExtraccionBecas:
         archivos_pdf = list(self.ruta_data.glob("*.pdf"))
         print(f"--- Starting processing of {len(archivos_pdf)} files ---")
 
-        for ruta_pdf in archivos_pdf:
-            print(f"Processing: {ruta_pdf.name}...")
-            try:
-                # We open the PDF and extract all text from all pages
-                doc = fitz.open(ruta_pdf)
-                texto_completo = "".join([pagina.get_text() for pagina in doc])
-                
-                # We build a large dictionary with all the extracted info
-                info = {
-                    "fichero": ruta_pdf.name,
-                    "curso_academico": self.extract_academic_year(texto_completo, ruta_pdf.name),
-                    "programas_educativos": self.extract_programs(texto_completo),
-                    **self.extract_amounts(texto_completo),
-                    "excelencia_tramos": self.extract_excellence_brackets(texto_completo),
-                    "umbrales_renta": self.extract_thresholds(texto_completo),
-                    "umbrales_patrimonio": self.extract_patrimonio_thresholds(texto_completo),
-                    "requisitos_academicos": self.extract_academic_requirements(texto_completo),
-                    "suplementos_insulares": self.extract_insular_supplements(texto_completo),
-                    "deducciones_renta": self.extract_income_deductions(texto_completo),
-                    "discapacidad": self.extract_disability_provisions(texto_completo),
-                    "plazos_solicitud": self.extract_deadlines(texto_completo)
-                }
-                
-                self.datos_extraidos.append(info)
-                doc.close()
-            except Exception as e:
-                print(f"Error reading {ruta_pdf.name}: {e}")
+        # Each PDF is independent and CPU-bound (PyMuPDF + regex), so they run in separate processes.
+        # map() keeps the original file order; failed files come back as None.
+        # Scaling flattens out past ~4 workers (PyMuPDF's own overhead dominates), so cap it there
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 4)) as ex:
+            resultados = list(ex.map(self.procesar_pdf, archivos_pdf))
+        self.datos_extraidos.extend(info for info in resultados if info is not None)
 
         self.guardar_resultados()
 
     def guardar_resultados(self):
         """Saves everything to JSON and CSV formats."""
         # Save to JSON (best for structured/nested data)
-        with open("becas_estructuradas.json", "w", encoding="utf-8") as f:
-            json.dump(self.datos_extraidos, f, indent=4, ensure_ascii=False)
+        Path("becas_estructuradas.json").write_text(dumps_json(self.datos_extraidos, indent=True), encoding="utf-8")
         
         # Save to CSV (best for spreadsheets, but requires flattening nested dicts)
         if self.datos_extraidos:
-            csv_data = []
             nested_fields = [
                 "umbrales_renta", "umbrales_patrimonio", "requisitos_academicos",
                 "excelencia_tramos", "suplementos_insulares", "deducciones_renta",
                 "discapacidad", "plazos_solicitud"
             ]
-            for item in self.datos_extraidos:
-                row = item.copy()
-                # For CSV, we convert internal dictionaries into JSON strings
-                for field in nested_fields:
-                    if field in row and isinstance(row[field], (dict, list)):
-                        row[field] = json.dumps(row[field], ensure_ascii=False)
-                # Trim long text to keep the CSV readable
-                if len(row.get("programas_educativos", "")) > 500:
-                    row["programas_educativos"] = row["programas_educativos"][:500] + "..."
-                csv_data.append(row)
-
-            columnas = csv_data[0].keys()
+            columnas = list(self.datos_extraidos[0].keys())
             with open("becas_estructuradas.csv", "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.DictWriter(f, fieldnames=columnas)
-                writer.writeheader()
-                writer.writerows(csv_data)
+                # Plain csv.writer on value lists; missing keys become "" as with DictWriter
+                writer = csv.writer(f)
+                writer.writerow(columnas)
+                # Rows are flattened and written one at a time instead of copying the whole list first
+                for item in self.datos_extraidos:
+                    row = item.copy()
+                    # For CSV, we convert internal dictionaries into JSON strings
+                    for field in nested_fields:
+                        if field in row and isinstance(row[field], (dict, list)):
+                            row[field] = dumps_json(row[field])
+                    # Trim long text to keep the CSV readable
+                    if len(row.get("programas_educativos", "")) > 500:
+                        row["programas_educativos"] = row["programas_educativos"][:500] + "..."
+                    writer.writerow([row.get(c, "") for c in columnas])
         
         print("\n--- Process Finished! ---")
         print("Generated files: 'becas_estructuradas.json' and 'becas_estructuradas.csv'")
 
-def looks_like_amount(lines, idx):
-    """Helper to check if a line of text looks like a currency amount (e.g., 10.500)."""
-    if idx >= len(lines): return False
-    return bool(re.match(r"^[\d\.]+$", lines[idx].strip()))
-
 if __name__ == "__main__":
     # Start the system using the 'data' folder
     sistema = SistemaExtraccionBecas(carpeta_entrada="data")
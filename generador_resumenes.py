@@ -1,9 +1,12 @@
-import json
+import asyncio
+import functools
 import time
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
+from json_io import dumps_json, load_json
 
 # We load environment variables from .env (like our API keys)
 load_dotenv()
@@ -13,15 +16,15 @@ load_dotenv()
 # ──────────────────────────────────────────────
 
 def load_data(path="becas_estructuradas.json"):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_json(path)
 
 def build_prompt_single(year_data):
     """
     PROMPT GENÉRICO Y HONESTO:
     No se le da una estructura fija. Se pide un resumen profesional en texto plano.
     """
-    data_str = json.dumps(year_data, indent=2, ensure_ascii=False)
+    # Compact JSON: indentation whitespace only adds prompt tokens, not information
+    data_str = dumps_json(year_data)
     return (
         "You are an expert assistant in Spanish education grants. "
         "Based on the following structured data from the official BOE, write a clear "
@@ -40,7 +43,7 @@ def build_prompt_combined(all_data):
     PROMPT DE ANÁLISIS EVOLUTIVO:
     Pide comparar los cambios a lo largo de los años de forma natural.
     """
-    data_str = json.dumps(all_data, indent=2, ensure_ascii=False)
+    data_str = dumps_json(all_data)
     return (
         "Analyze the following data containing scholarship information from 2021 to 2026. "
         "Write a comprehensive report in English explaining how these grants have "
@@ -56,18 +59,26 @@ def build_prompt_combined(all_data):
 # 2. DeepSeek API Integration
 # ──────────────────────────────────────────────
 
-def generate_deepseek(prompt, model="deepseek-chat"):
-    """
-    Sends our prompt to the DeepSeek API. 
-    We use a low 'temperature' (0.3) so the AI stays focused on facts instead of being too creative.
-    """
-    from openai import OpenAI
+# How many DeepSeek requests may be in flight at once, and how many times the
+# client retries a rate-limited/failed request (with exponential backoff)
+DEEPSEEK_MAX_CONCURRENT = 10
+DEEPSEEK_MAX_RETRIES = 5
 
-    client = OpenAI(
+def deepseek_client():
+    """One shared async client, so every request reuses the same connection pool."""
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
         api_key=os.getenv("DEEPSEEK_API_KEY"),
-        base_url="https://api.deepseek.com"
+        base_url="https://api.deepseek.com",
+        max_retries=DEEPSEEK_MAX_RETRIES,
     )
 
+async def generate_deepseek(client, prompt, model="deepseek-chat"):
+    """
+    Sends our prompt to the DeepSeek API. 
+    We use a low 'temperature' (0.3) so the AI stays focused on facts instead of being too creative.
+    """
     # We tell the AI how to behave (No markdown, plain text)
     system_msg = "You are a helpful assistant that summarizes technical data into clear plain text without any markdown formatting."
 
@@ -84,23 +95,40 @@ def generate_deepseek(prompt, model="deepseek-chat"):
     if model != "deepseek-reasoner":
         kwargs["temperature"] = 0.3
 
+    # Stream the answer: the text arrives in chunks, and with include_usage the
+    # last chunk carries the token counts
+    kwargs["stream"] = True
+    kwargs["stream_options"] = {"include_usage": True}
+
     start = time.time()
-    response = client.chat.completions.create(**kwargs)
+    stream = await client.chat.completions.create(**kwargs)
+
+    text_parts, reasoning_parts, usage = [], [], None
+    async for chunk in stream:
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            text_parts.append(delta.content)
+        # If the model has a "reasoning" step (like DeepSeek-R1), it is streamed separately
+        reasoning = getattr(delta, "reasoning_content", None)
+        if reasoning:
+            reasoning_parts.append(reasoning)
     elapsed = time.time() - start
 
     # We collect some stats about the generation (time, tokens used, etc.)
     result = {
-        "text": response.choices[0].message.content,
+        "text": "".join(text_parts),
         "model": model,
         "time_seconds": round(elapsed, 2),
-        "tokens_input": response.usage.prompt_tokens,
-        "tokens_output": response.usage.completion_tokens,
+        "tokens_input": usage.prompt_tokens if usage else None,
+        "tokens_output": usage.completion_tokens if usage else None,
     }
 
-    # If the model has a "reasoning" step (like DeepSeek-R1), we save that too
-    reasoning = getattr(response.choices[0].message, "reasoning_content", None)
-    if reasoning:
-        result["reasoning_content"] = reasoning
+    if reasoning_parts:
+        result["reasoning_content"] = "".join(reasoning_parts)
 
     return result
 
@@ -108,33 +136,99 @@ def generate_deepseek(prompt, model="deepseek-chat"):
 # 3. Local Model (GPT-2)
 # ──────────────────────────────────────────────
 
+# Set USE_COMPILE=1 to run the local model through torch.compile. It only pays off
+# when the compile time is amortized over many decode steps, so it is opt-in.
+USE_COMPILE = os.getenv("USE_COMPILE") == "1"
+
+@functools.lru_cache(maxsize=4)
+def _get_local(model_name):
+    """Loads a local model once and returns (tokenizer, model, device) for every later call."""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    import torch
+
+    # Use a GPU (CUDA, or the 'MPS' chip on Macs) if available, otherwise use CPU
+    if torch.cuda.is_available():
+        device = "cuda"
+    elif torch.backends.mps.is_available():
+        device = "mps"
+    else:
+        device = "cpu"
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    # Decoder-only models must be padded on the left to be generated in a batch
+    tokenizer.padding_side = "left"
+
+    # Half precision halves the weight traffic on the GPU; CPUs stay in float32,
+    # where fp16/bf16 matmuls are usually not faster
+    dtype = torch.float32 if device == "cpu" else torch.float16
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=dtype).to(device)
+    model.eval()
+
+    if USE_COMPILE:
+        from torch._dynamo import exc as dynamo_exc
+        from torch._inductor import exc as inductor_exc
+
+        # A static KV cache keeps every decode step at the same shape; with the default
+        # growing cache each new token would trigger another recompile
+        model.generation_config.cache_implementation = "static"
+
+        # Compiling forward (not the wrapper module) is what generate() actually calls
+        eager_forward = model.forward
+        compiled_forward = torch.compile(eager_forward, mode="reduce-overhead", fullgraph=True)
+        compile_errors = (dynamo_exc.BackendCompilerFailed, dynamo_exc.Unsupported)
+        if hasattr(inductor_exc, "InductorError"):
+            compile_errors += (inductor_exc.InductorError,)
+
+        @functools.wraps(eager_forward)
+        def forward(*args, **kwargs):
+            # torch.compile is lazy: backend/device errors only show up on the first call,
+            # so that is where we fall back to the eager forward for good. Any other
+            # error (e.g. out of memory) is a real failure and is raised as usual.
+            try:
+                return compiled_forward(*args, **kwargs)
+            except compile_errors as e:
+                print(f"  torch.compile failed on {device}, running eager: {e}")
+                model.forward = eager_forward
+                return eager_forward(*args, **kwargs)
+
+        model.forward = forward
+
+    return tokenizer, model, device
+
 def generate_local(prompt, model_name="gpt2"):
     """
     Generates a summary using a model running on our own computer (GPT-2).
     This is slower and less powerful than the API, but works offline!
     """
-    from transformers import AutoModelForCausalLM, AutoTokenizer
+    return generate_local_batch([prompt], model_name)[0]
+
+def generate_local_batch(prompts, model_name="gpt2"):
+    """
+    Same as generate_local, but for a list of prompts at once: they are padded into
+    a single batch and generated with one model.generate call, which keeps the
+    device busy instead of decoding one sequence at a time.
+    """
     import torch
 
-    # Use a faster 'MPS' chip on Macs if available, otherwise use CPU
-    device = "mps" if torch.backends.mps.is_available() else "cpu"
-    
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForCausalLM.from_pretrained(model_name).to(device)
+    tokenizer, model, device = _get_local(model_name)
 
     prefix = "Summary in plain text:\n\n"
     max_input = 700 
-    tokens = tokenizer.encode(prefix + prompt)
-    if len(tokens) > max_input:
-        tokens = tokens[:max_input]
-    input_text = tokenizer.decode(tokens)
-    inputs = tokenizer(input_text, return_tensors="pt").to(device)
-    
-    if tokenizer.pad_token is None:
-        tokenizer.pad_token = tokenizer.eos_token
+    inputs = tokenizer(
+        [prefix + prompt for prompt in prompts],
+        return_tensors="pt",
+        # With a compiled model every batch is padded to the same length, so the prefill
+        # graph and the static cache size stay the same for every call (at the cost of
+        # always prefilling 700 tokens)
+        padding="max_length" if USE_COMPILE else True,
+        truncation=True,
+        max_length=max_input,
+    ).to(device)
 
     start = time.time()
-    with torch.no_grad():
+    with torch.inference_mode():
         outputs = model.generate(
             **inputs,
             max_new_tokens=300,
@@ -142,25 +236,116 @@ def generate_local(prompt, model_name="gpt2"):
             do_sample=True,
             top_p=0.9,
             pad_token_id=tokenizer.eos_token_id,
+            use_cache=True,  # reuse past keys/values across the decode steps
+            # Plain sampling that returns only the token ids, whatever the model's
+            # generation_config says: no beams, scores, attentions or hidden states kept
+            num_beams=1,
+            return_dict_in_generate=False,
+            output_scores=False,
+            output_attentions=False,
+            output_hidden_states=False,
         )
     elapsed = time.time() - start
 
-    # Remove the prompt from the output to get only the new summary
-    generated = outputs[0][inputs["input_ids"].shape[1]:]
-    text = tokenizer.decode(generated, skip_special_tokens=True)
-    
-    return {
-        "text": text,
-        "model": model_name,
-        "time_seconds": round(elapsed, 2),
-        "tokens_input": inputs["input_ids"].shape[1],
-        "tokens_output": len(generated),
-    }
+    results = []
+    prompt_len = inputs["input_ids"].shape[1]
+    for i, row in enumerate(outputs):
+        # Remove the prompt from the output to get only the new summary; rows that
+        # stopped early are padded with EOS, so we cut them after the first one
+        generated = row[prompt_len:].tolist()
+        if tokenizer.eos_token_id in generated:
+            generated = generated[:generated.index(tokenizer.eos_token_id) + 1]
+        text = tokenizer.decode(generated, skip_special_tokens=True)
+
+        results.append({
+            "text": text,
+            "model": model_name,
+            # Every summary in the batch waits for the whole generate call, so that is its latency
+            "time_seconds": round(elapsed, 2),
+            "batch_size": len(prompts),
+            "tokens_input": int(inputs["attention_mask"][i].sum()),
+            "tokens_output": len(generated),
+        })
+
+    return results
 
 # ──────────────────────────────────────────────
 # 4. Main Automation Pipeline
 # ──────────────────────────────────────────────
 
+async def run_jobs(jobs, on_result):
+    """
+    Runs every (key, model_type, model_id, prompt) job at once: the DeepSeek calls
+    are I/O-bound and go out concurrently, while each local model generates all of
+    its prompts as one batch in a background thread.
+    on_result(key, model_id, result) is called as soon as each job finishes;
+    failures are passed as the exception instead of a result.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(DEEPSEEK_MAX_CONCURRENT)
+
+    local_batches = {}
+    remote_jobs = []
+    for key, model_type, model_id, prompt in jobs:
+        if model_type == "local":
+            local_batches.setdefault(model_id, []).append((key, prompt))
+        else:
+            remote_jobs.append((key, model_id, prompt))
+
+    client, client_error = None, None
+    if remote_jobs:
+        try:
+            client = deepseek_client()
+        except Exception as e:  # e.g. missing API key: reported for every DeepSeek job
+            client_error = e
+
+    async def run_local(model_id, batch):
+        print(f"[LOCAL] -> Generating {len(batch)} summaries with {model_id} in one batch...")
+        prompts = [prompt for _, prompt in batch]
+        try:
+            outputs = await loop.run_in_executor(local_pool, generate_local_batch, prompts, model_id)
+        except Exception as e:
+            outputs = [e] * len(batch)
+        # Scatter the batched results back to their (key, model) slots
+        for (key, _), res in zip(batch, outputs):
+            on_result(key, model_id, res)
+
+    async def run_remote(key, model_id, prompt):
+        try:
+            if client is None:
+                raise client_error
+            async with semaphore:
+                print(f"[{key}] -> Generating with {model_id}...")
+                res = await generate_deepseek(client, prompt, model_id)
+        except Exception as e:
+            res = e
+        on_result(key, model_id, res)
+
+    # A single worker keeps the local models from being used by two threads at once
+    with ThreadPoolExecutor(max_workers=1) as local_pool:
+        try:
+            await asyncio.gather(
+                *(run_local(m, b) for m, b in local_batches.items()),
+                *(run_remote(*job) for job in remote_jobs),
+            )
+        finally:
+            if client is not None:
+                await client.close()
+
+def save_results(results, path="resumenes_generados.json"):
+    """
+    Writes the summaries finished so far. Pending models are left out, and the file is
+    written to a temp file first and then swapped in, so an interrupted run never
+    leaves a half-written JSON behind.
+    """
+    done = {
+        key: {model_id: res for model_id, res in by_model.items() if res is not None}
+        for key, by_model in results.items()
+    }
+    tmp_path = Path(f"{path}.tmp")
+    tmp_path.write_text(dumps_json(done, indent=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
 def run_all():
     """Loops through all years and generates summaries with all models."""
     data = load_data()
@@ -173,43 +358,26 @@ def run_all():
         ("deepseek-reasoner", "deepseek-reasoner"),
     ]
 
-    # --- Phase 1: Yearly Summaries ---
-    for year_data in data:
-        year = year_data["curso_academico"]
-        prompt = build_prompt_single(year_data)
-        results[year] = {}
+    # Phase 1 (yearly summaries) and Phase 2 (combined trend report) share one job list
+    prompts = [(year_data["curso_academico"], build_prompt_single(year_data)) for year_data in data]
+    prompts.append(("combined", build_prompt_combined(data)))
 
+    jobs = []
+    for key, prompt in prompts:
+        # Placeholders keep the models in the same order in the JSON, whatever finishes first
+        results[key] = {model_id: None for _, model_id in models}
         for model_type, model_id in models:
-            print(f"[{year}] -> Generating with {model_id}...")
-            try:
-                if model_type == "local":
-                    res = generate_local(prompt, model_id)
-                else:
-                    res = generate_deepseek(prompt, model_id)
-                results[year][model_id] = res
-            except Exception as e:
-                print(f"  ERROR in {model_id}: {e}")
-                results[year][model_id] = {"error": str(e)}
-
-    # --- Phase 2: Combined Trend Report ---
-    combined_prompt = build_prompt_combined(data)
-    results["combined"] = {}
-
-    for model_type, model_id in models:
-        print(f"[COMBINED] -> Generating with {model_id}...")
-        try:
-            if model_type == "local":
-                res = generate_local(combined_prompt, model_id)
-            else:
-                res = generate_deepseek(combined_prompt, model_id)
-            results["combined"][model_id] = res
-        except Exception as e:
-            print(f"  ERROR en {model_id}: {e}")
-            results["combined"][model_id] = {"error": str(e)}
+            jobs.append((key, model_type, model_id, prompt))
+
+    def on_result(key, model_id, res):
+        if isinstance(res, Exception):
+            print(f"  ERROR in {model_id} [{key}]: {res}")
+            res = {"error": str(res)}
+        results[key][model_id] = res
+        # Save after every summary so finished work survives a later API failure
+        save_results(results)
 
-    # Save all generated text into a single JSON file
-    with open("resumenes_generados.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=4, ensure_ascii=False)
+    asyncio.run(run_jobs(jobs, on_result))
 
     print("\n✅ Generation completed! Format biases were avoided.")
     print("Next step: Run the evaluator to check how smart these models really are.")
@@ -1,31 +1,64 @@
-import torch
-import json
+import functools
+import hashlib
 import re
 import os
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from pathlib import Path
+from json_io import dumps_json, load_json
 
 # Hide TensorFlow warnings
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 # We use Vectara's model which is specifically trained to detect hallucinations (when AI lies)
-model_name = "vectara/hallucination_evaluation_model"
-tokenizer = AutoTokenizer.from_pretrained(model_name, revision="hhem-1.0-open")
-model = AutoModelForSequenceClassification.from_pretrained(model_name, revision="hhem-1.0-open")
+hhem_model_name = "vectara/hallucination_evaluation_model"
+HHEM_REVISION = "hhem-1.0-open"
+# Longest (premise + summary) input the model sees, in tokens
+MAX_LENGTH = 4096
 
-# Load extraction results and generated summaries
-with open('becas_estructuradas.json', 'r', encoding='utf-8') as f:
-    becas_data = json.load(f)
+# How many (premise, summary) pairs go through the model in one forward pass
+BATCH_SIZE = 8
+
+# Scores already computed, keyed by sha256 of the model settings, premise and summary
+CACHE_PATH = 'halluc_cache.json'
+
+@functools.lru_cache(maxsize=1)
+def elegir_dispositivo():
+    """Returns (device, dtype name). Half precision only on the GPU; on CPU float16 would be slower."""
+    import torch
 
-with open('resumenes_generados.json', 'r', encoding='utf-8') as f:
-    resumenes_data = json.load(f)
+    # Same device choice as the generator: GPU (CUDA or the Mac 'MPS' chip) if available
+    if torch.cuda.is_available():
+        device = "cuda"
+    elif torch.backends.mps.is_available():
+        device = "mps"
+    else:
+        device = "cpu"
+    return device, "float32" if device == "cpu" else "float16"
+
+@functools.lru_cache(maxsize=1)
+def cargar_modelo():
+    """Loads the HHEM tokenizer and model only when some pair actually needs scoring."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    device, dtype = elegir_dispositivo()
+    tokenizer = AutoTokenizer.from_pretrained(hhem_model_name, revision=HHEM_REVISION)
+    model = AutoModelForSequenceClassification.from_pretrained(hhem_model_name, revision=HHEM_REVISION)
+    model = model.to(device).eval()
+    if dtype == "float16":
+        model = model.half()
+    return tokenizer, model, device
+
+# Load extraction results and generated summaries
+becas_data = load_json('becas_estructuradas.json')
+resumenes_data = load_json('resumenes_generados.json')
 
 
 def generar_texto_becas(datos):
     """
     To evaluate a summary, the model needs a 'Premise' (the facts).
     This function converts our structured JSON back into a long natural text string.
+    The pieces are collected in a list and joined once at the end.
     """
-    texto = f"""Fichero: {datos['fichero']}.
+    partes = [f"""Fichero: {datos['fichero']}.
 Curso académico: {datos['curso_academico']}.
 Programas educativos: {datos['programas_educativos']}
 Cuantía renta fija: {datos['cuantia_renta_fija']} euros.
@@ -34,56 +67,80 @@ Beca básica: {datos['beca_basica']} euros.
 Cuantía variable mínima: {datos['cuantia_variable_minima']} euros.
 Excelencia mínima: {datos['excelencia_min']} euros.
 Excelencia máxima: {datos['excelencia_max']} euros.
-Tramos de excelencia: """
+Tramos de excelencia: """]
     for tramo in datos['excelencia_tramos']:
-        texto += f"Nota media {tramo['nota_media']} recibe {tramo['cuantia_euros']} euros. "
+        partes.append(f"Nota media {tramo['nota_media']} recibe {tramo['cuantia_euros']} euros. ")
     
     umbrales = datos['umbrales_renta']
     
     # Handle the two different threshold structures (old JSON vs new Table format)
     if 'Umbral 1' in umbrales:
-        texto += f"""
+        partes.append(f"""
 Límites Umbral 1: {umbrales['Umbral 1']['un']} (1 miembro), {umbrales['Umbral 1']['dos']} (2 miembros), ...
-Límites Umbral 2: {umbrales['Umbral 2']['un']} (1 miembro), {umbrales['Umbral 2']['dos']} (2 miembros), ..."""
+Límites Umbral 2: {umbrales['Umbral 2']['un']} (1 miembro), {umbrales['Umbral 2']['dos']} (2 miembros), ...""")
     elif 'tabla' in umbrales:
-        texto += "\nUmbrales de renta por familia: "
+        familias = []
         for item in umbrales['tabla']:
             miembros = item.get('miembros', '?')
             umbral_1 = item.get('umbral_1', '?')
             umbral_2 = item.get('umbral_2', '?')
             umbral_3 = item.get('umbral_3', '?')
-            texto += f"{miembros} miembros ({umbral_1}/{umbral_2}/{umbral_3}), "
-        texto = texto.rstrip(', ') + "."
+            familias.append(f"{miembros} miembros ({umbral_1}/{umbral_2}/{umbral_3})")
+        linea = "\nUmbrales de renta por familia: " + ", ".join(familias)
+        partes.append(linea.rstrip(', ') + ".")
     
     # Add requirements, supplements, and deductions
-    texto += f"""
+    partes.append(f"""
 Umbrales de patrimonio: Límite urbanas {datos['umbrales_patrimonio']['fincas_urbanas_limite']}.
 Requisitos académicos: Créditos completo {datos['requisitos_academicos']['creditos_tiempo_completo']}. 
 Suplementos insulares: Básico {datos['suplementos_insulares']['suplemento_insular_basico']}. 
 Deducciones de renta: Familia numerosa especial {datos['deducciones_renta']['deduccion_familia_numerosa_especial']}. 
-Plazos de solicitud: {datos['plazos_solicitud']['texto_extracto']}"""
+Plazos de solicitud: {datos['plazos_solicitud']['texto_extracto']}""")
     
-    return texto
+    return "".join(partes)
+
+# Built once: translation table that deletes '*' and the newline-run pattern
+_SIN_ASTERISCOS = str.maketrans('', '', '*')
+_SALTOS_RE = re.compile(r'\n+')
 
 def limpiar_resumen(texto):
     """Removes special markdown characters (like **) that might confuse the evaluator model."""
     if not texto:
         return ""
-    texto = texto.replace('*', '')
-    texto = re.sub(r'\n+', ' ', texto)
-    return texto.strip()
+    return _SALTOS_RE.sub(' ', texto.translate(_SIN_ASTERISCOS)).strip()
 
-def evaluar_alucinacion(premisa, hipotesis):
+def evaluar_alucinaciones(premisas, hipotesis):
     """
-    Computes a score from 0 to 1. 
+    Computes a score from 0 to 1 for every (premise, summary) pair. 
     1.0 means no hallucinations detected (perfect truth). 
     0.0 means the model is likely lying.
+    Pairs are padded into batches so the model scores several of them per forward pass.
     """
-    inputs = tokenizer(premisa, hipotesis, return_tensors="pt", truncation=True, max_length=4096)
-    with torch.no_grad():
-        logits = model(**inputs).logits
-        score = torch.sigmoid(logits).squeeze().item()
-    return score
+    import torch
+
+    tokenizer, model, device = cargar_modelo()
+
+    # Each year's premise is tokenized only once, however many summaries are compared with it;
+    # prepare_for_model then adds the special tokens and truncates exactly as tokenizer(a, b) would
+    premisa_ids = {p: tokenizer(p, add_special_tokens=False)["input_ids"] for p in set(premisas)}
+    hipotesis_ids = tokenizer(list(hipotesis), add_special_tokens=False)["input_ids"] if hipotesis else []
+    codificados = [
+        tokenizer.prepare_for_model(premisa_ids[p], h, truncation=True, max_length=MAX_LENGTH)
+        for p, h in zip(premisas, hipotesis_ids)
+    ]
+
+    scores = []
+    for i in range(0, len(codificados), BATCH_SIZE):
+        inputs = tokenizer.pad(codificados[i:i + BATCH_SIZE], return_tensors="pt").to(device)
+        with torch.inference_mode():
+            logits = model(**inputs).logits
+            # Back to float32 before the sigmoid, so half-precision logits keep their resolution
+            scores.extend(torch.sigmoid(logits.float()).squeeze(-1).tolist())
+    return scores
+
+def evaluar_alucinacion(premisa, hipotesis):
+    """Single-pair version of evaluar_alucinaciones."""
+    return evaluar_alucinaciones([premisa], [hipotesis])[0]
 
 
 # ──────────────────────────────────────────────
@@ -92,29 +149,25 @@ def evaluar_alucinacion(premisa, hipotesis):
 
 anos_disponibles = sorted(set(item['curso_academico'] for item in becas_data))
 
-print("=" * 80)
-print("HALLUCINATION EVALUATION RESULTS (VECTARA HHEM)")
-print("=" * 80)
-
+# First collect every (year, model, premise, summary) to score, so that they
+# can all go through the model in batches
+pares = []
 for anio_academico in anos_disponibles:
-    print(f"\nAcademic Year: {anio_academico}")
-    print("-" * 80)
-    
     # Find scholarship facts for this year
     datos_becas = next((item for item in becas_data if item['curso_academico'] == anio_academico), None)
     
     if datos_becas is None:
         continue
     
-    # Convert facts to text format
-    premisa_facts = generar_texto_becas(datos_becas)
-    
     # Get the generated summaries for this year
     resumenes_anno = resumenes_data.get(anio_academico, {})
     
     if not resumenes_anno:
         continue
     
+    # Convert facts to text format
+    premisa_facts = generar_texto_becas(datos_becas)
+    
     # Evaluate each model's summary
     for model_name in ['gpt2', 'deepseek-chat', 'deepseek-reasoner']:
         gen_text = resumenes_anno.get(model_name, {}).get('text', '')
@@ -122,8 +175,45 @@ for anio_academico in anos_disponibles:
             continue
             
         cleaned_summary = limpiar_resumen(gen_text)
-        halluc_score = evaluar_alucinacion(premisa_facts, cleaned_summary)
-        
-        print(f"  {model_name.upper():<20}: {halluc_score:.4f}")
+        pares.append((anio_academico, model_name, premisa_facts, cleaned_summary))
+
+def clave_cache(premisa, hipotesis):
+    # Scores depend on the model, its revision, the truncation length and the precision
+    # it ran in, so a change in any of them must not reuse old entries
+    device, dtype = elegir_dispositivo()
+    partes = (hhem_model_name, HHEM_REVISION, str(MAX_LENGTH), device, dtype, premisa, hipotesis)
+    return hashlib.sha256("\x00".join(partes).encode('utf-8')).hexdigest()
+
+cache = {}
+if os.path.exists(CACHE_PATH):
+    cache = load_json(CACHE_PATH)
+
+claves = [clave_cache(premisa, hipotesis) for _, _, premisa, hipotesis in pares]
+
+# Only pairs that changed since the last run are scored; if none did, the model is never loaded
+pendientes = [(clave, par) for clave, par in zip(claves, pares) if clave not in cache]
+if pendientes:
+    print(f"Scoring {len(pendientes)} new pairs ({len(pares) - len(pendientes)} cached)...")
+    nuevos = evaluar_alucinaciones([par[2] for _, par in pendientes], [par[3] for _, par in pendientes])
+    for (clave, _), score in zip(pendientes, nuevos):
+        cache[clave] = score
+    # Written to a temp file and swapped in, so an interrupted run can't leave a truncated cache
+    tmp_path = Path(f"{CACHE_PATH}.tmp")
+    tmp_path.write_text(dumps_json(cache, indent=True), encoding='utf-8')
+    os.replace(tmp_path, CACHE_PATH)
+
+scores = [cache[clave] for clave in claves]
+
+print("=" * 80)
+print("HALLUCINATION EVALUATION RESULTS (VECTARA HHEM)")
+print("=" * 80)
+
+for anio_academico in anos_disponibles:
+    print(f"\nAcademic Year: {anio_academico}")
+    print("-" * 80)
+    
+    for (anio, model_name, _, _), halluc_score in zip(pares, scores):
+        if anio == anio_academico:
+            print(f"  {model_name.upper():<20}: {halluc_score:.4f}")
 
 print("\n" + "=" * 80)
\ No newline at end of file
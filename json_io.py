@@ -0,0 +1,25 @@
+import json
+from pathlib import Path
+
+# orjson is optional and only makes reading/writing faster. The stdlib fallback
+# writes the same layout (2-space indent or compact, non-ASCII text kept as is).
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def dumps_json(obj, indent=False):
+    """Serializes to a JSON string (2-space indent or compact), with orjson when it is installed."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_json(path):
+    """Parses a JSON file, with orjson when it is installed."""
+    data = Path(path).read_bytes()
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)